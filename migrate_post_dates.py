@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Migration script to store blog post dates as epoch timestamps
+
+Posts used to store their date as a formatted string ("September 15, 2025").
+New posts store an integer epoch timestamp instead, which the templates format
+for display. The app still shows the old strings as they are; this script
+converts them so all posts share the same date type.
+"""
+import neosqlite
+import os
+import sys
+import tomllib
+from datetime import datetime
+
+
+def load_config():
+    """Load configuration from file, with support for custom path via environment variable."""
+    # Check for custom config path in environment variable
+    config_path = os.environ.get("NEO_BLOGGY_CONFIG_PATH", "config.toml")
+
+    config = {}
+    if os.path.exists(config_path):
+        with open(config_path, "rb") as f:
+            config = tomllib.load(f)
+    return config
+
+
+# Load configuration
+config = load_config()
+
+# Database configuration - use the same path as the main app
+DB_PATH = config.get("database", {}).get("db_path", "neo-bloggy.db")
+
+# The format old post dates were stored in
+OLD_DATE_FORMAT = "%B %d, %Y"
+
+
+def migrate_post_dates():
+    """
+    Convert string post dates to epoch timestamps (local midnight of that day)
+    """
+    print("Starting migration of post dates to epoch timestamps...")
+    print(f"Database path: {DB_PATH}")
+
+    if not os.path.exists(DB_PATH):
+        print(f"Database file '{DB_PATH}' not found.")
+        return False
+
+    try:
+        db = neosqlite.Connection(DB_PATH)
+        posts = [
+            post
+            for post in db.blog_posts.find()
+            if isinstance(post.get("date"), str)
+        ]
+        print(f"Found {len(posts)} posts with string dates")
+
+        for i, post in enumerate(posts):
+            try:
+                date_obj = datetime.strptime(post["date"], OLD_DATE_FORMAT)
+            except ValueError:
+                print(
+                    f"  Skipping post {post['_id']}: unrecognised date {post['date']!r}"
+                )
+                continue
+
+            db.blog_posts.update_one(
+                {"_id": post["_id"]},
+                {"$set": {"date": int(date_obj.timestamp())}},
+            )
+            print(f"  Updated post {i+1}/{len(posts)} with _id: {post['_id']}")
+
+        print("Migration of post dates completed!")
+        return True
+
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        import traceback
+
+        traceback.print_exc()
+        return False
+
+
+def backup_database():
+    """
+    Create a backup of the current database before migration
+    """
+    import shutil
+
+    backup_name = f"{DB_PATH}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    print(f"Creating backup: {backup_name}")
+
+    try:
+        shutil.copy2(DB_PATH, backup_name)
+        print(f"Backup created successfully: {backup_name}")
+        return backup_name
+    except Exception as e:
+        print(f"Error creating backup: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    print("Post Date Migration Script")
+    print("=" * 60)
+    print("This script will convert post dates stored as strings")
+    print("into epoch timestamps.")
+    print("=" * 60)
+
+    # Confirm with user before proceeding
+    response = input(
+        "\nThis script will update the dates of your blog posts.\n"
+        "A backup will be created first.\n"
+        "Do you want to proceed? (y/N): "
+    )
+
+    if response.lower() != "y":
+        print("Migration cancelled.")
+        sys.exit(0)
+
+    # Create backup
+    backup_path = backup_database()
+    if backup_path is None:
+        print("Could not create backup. Aborting migration.")
+        sys.exit(1)
+
+    # Perform migration
+    success = migrate_post_dates()
+
+    if not success:
+        print("\nMigration failed. Your data is preserved in the backup file.")
+        print(f"Backup location: {backup_path}")
+        sys.exit(1)
+    else:
+        print("\nMigration completed successfully!")
+        print(f"Backup available at: {backup_path}")
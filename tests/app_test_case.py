@@ -0,0 +1,74 @@
+import app as blog
+import neosqlite
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+# Add the project directory to the Python path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+
+class AppTestCase(unittest.TestCase):
+    """Base class for tests that run requests against a fresh database"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        db_path = os.path.join(self.tmp_dir, "test.db")
+        for name, value in (
+            ("DB_PATH", db_path),
+            ("db_initialized", False),
+            ("db_local", threading.local()),
+            ("CACHE_ENABLED", True),
+        ):
+            patcher = mock.patch.object(blog, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        blog.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+        blog.cache_storage.clear()
+        self.addCleanup(blog.cache_storage.clear)
+        self.db = neosqlite.Connection(db_path)
+        self.client = blog.app.test_client()
+
+    def tearDown(self):
+        if getattr(blog.db_local, "db", None) is not None:
+            blog.db_local.db.close()
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def add_user(self, name, is_admin=False, is_active=True):
+        """Insert a user directly, bypassing registration"""
+        self.db.users.insert_one(
+            {
+                "email": f"{name}@example.com",
+                "password": blog.hash_password("secret123"),
+                "name": name,
+                "is_admin": is_admin,
+                "is_active": is_active,
+            }
+        )
+
+    def add_post(self, title, author):
+        """Insert a post and return its ID as used in URLs"""
+        result = self.db.blog_posts.insert_one(
+            {
+                "title": title,
+                "subtitle": f"{title} subtitle",
+                "body": f"{title} body",
+                "img_url": "https://example.com/image.png",
+                "author": author,
+                "date": int(time.time()),
+            }
+        )
+        return str(result.inserted_id)
+
+    def login(self, name, client=None):
+        """Log a test client (by default `self.client`) in as `name`"""
+        with (client or self.client).session_transaction() as session:
+            session["user"] = name
+        return client or self.client
@@ -0,0 +1,44 @@
+from app_test_case import AppTestCase
+import app as blog
+import sqlite3
+import unittest
+
+
+class TestActiveAuthors(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_user("alice")
+        self.add_user("bobby", is_active=False)
+        self.add_post('Visible hel"lo story', "alice")
+        self.add_post('Hidden hel"lo story', "bobby")
+
+    def assert_only_visible(self, response):
+        self.assertEqual(response.status_code, 200)
+        html = response.get_data(as_text=True)
+        self.assertIn("Visible", html)
+        self.assertNotIn("Hidden", html)
+
+    def test_index_hides_disabled_authors(self):
+        """Test that the index leaves out posts by disabled users"""
+        self.assert_only_visible(self.client.get("/"))
+
+    def test_search_hides_disabled_authors(self):
+        """Test that full-text search leaves out posts by disabled users"""
+        self.assert_only_visible(
+            self.client.post("/search", data={"query": "story"})
+        )
+
+    def test_search_fallback_hides_disabled_authors(self):
+        """Test that the substring fallback leaves out disabled users"""
+        # FTS5 rejects the unbalanced quote, so the LIKE fallback runs
+        with blog.app.app_context():
+            with self.assertRaises(sqlite3.OperationalError):
+                blog.search_active_posts(blog.get_db(), 'hel"lo')
+        self.assert_only_visible(
+            self.client.post("/search", data={"query": 'hel"lo'})
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
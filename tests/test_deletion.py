@@ -0,0 +1,97 @@
+from app_test_case import AppTestCase
+import neosqlite
+import unittest
+
+
+class TestDeletion(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_user("alice", is_admin=True)
+        self.add_user("bobby")
+        self.post_id = self.add_post("Alice Post", "alice")
+        self.comment_id = self.add_comment("alice says hi", "alice")
+        self.missing_id = str(neosqlite.objectid.ObjectId())
+
+    def add_comment(self, text, author):
+        result = self.db.blog_comments.insert_one(
+            {
+                "text": text,
+                "comment_author": author,
+                "parent_post": self.post_id,
+            }
+        )
+        return str(result.inserted_id)
+
+    def flashes(self):
+        with self.client.session_transaction() as session:
+            return [message for _, message in session.pop("_flashes", [])]
+
+    def test_delete_own_post(self):
+        """Test that authors can delete their posts"""
+        self.login("alice")
+        self.client.get(f"/delete/{self.post_id}")
+        self.assertEqual(self.flashes(), ["Post Successfully Deleted"])
+        self.assertIsNone(self.db.blog_posts.find_one({"title": "Alice Post"}))
+
+    def test_delete_other_users_post(self):
+        """Test that users can't delete posts they didn't write"""
+        self.login("bobby")
+        self.client.get(f"/delete/{self.post_id}")
+        self.assertEqual(
+            self.flashes(), ["You can only delete your own posts."]
+        )
+        self.assertIsNotNone(
+            self.db.blog_posts.find_one({"title": "Alice Post"})
+        )
+
+    def test_delete_missing_post(self):
+        """Test that deleting a missing post says it wasn't found"""
+        self.login("alice")
+        self.client.get(f"/delete/{self.missing_id}")
+        self.assertEqual(self.flashes(), ["Post not found."])
+
+    def test_delete_own_comment(self):
+        """Test that users can delete their comments"""
+        comment_id = self.add_comment("bob says hi", "bobby")
+        self.login("bobby")
+        self.client.get(f"/delete_comment/{comment_id}?post_id={self.post_id}")
+        self.assertEqual(self.flashes(), ["Comment Successfully Deleted"])
+        self.assertIsNone(
+            self.db.blog_comments.find_one({"text": "bob says hi"})
+        )
+
+    def test_delete_other_users_comment(self):
+        """Test that users can't delete comments they didn't write"""
+        self.login("bobby")
+        self.client.get(
+            f"/delete_comment/{self.comment_id}?post_id={self.post_id}"
+        )
+        self.assertEqual(
+            self.flashes(), ["You can only delete your own comments."]
+        )
+        self.assertIsNotNone(
+            self.db.blog_comments.find_one({"text": "alice says hi"})
+        )
+
+    def test_admin_deletes_any_comment(self):
+        """Test that admins can delete other users' comments"""
+        comment_id = self.add_comment("bob says hi", "bobby")
+        self.login("alice")
+        self.client.get(f"/delete_comment/{comment_id}?post_id={self.post_id}")
+        self.assertEqual(self.flashes(), ["Comment Successfully Deleted"])
+        self.assertIsNone(
+            self.db.blog_comments.find_one({"text": "bob says hi"})
+        )
+
+    def test_delete_missing_comment(self):
+        """Test that deleting a missing comment says it wasn't found"""
+        self.login("bobby")
+        self.client.get(
+            f"/delete_comment/{self.missing_id}?post_id={self.post_id}"
+        )
+        self.assertEqual(self.flashes(), ["Comment not found."])
+
+
+if __name__ == "__main__":
+    unittest.main()
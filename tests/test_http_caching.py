@@ -0,0 +1,131 @@
+from app_test_case import AppTestCase
+from unittest import mock
+import app as blog
+import io
+import neosqlite
+import unittest
+
+
+class TestConditionalRequests(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_user("alice")
+        self.post_id = self.add_post("First Post", "alice")
+
+    def assert_revalidates(self, url):
+        """Request `url`, then check that its ETag is answered with 304"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["ETag"]
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+        return etag
+
+    def test_index_not_modified(self):
+        """Test that the index answers a matching ETag with 304"""
+        self.assert_revalidates("/")
+
+    def test_sitemap_not_modified(self):
+        """Test that the sitemap answers a matching ETag with 304"""
+        self.assert_revalidates("/sitemap.xml")
+
+    def test_gridfs_file_not_modified(self):
+        """Test that a stored file answers a matching ETag with 304"""
+        file_id = neosqlite.gridfs.GridFSBucket(self.db.db).upload_from_stream(
+            "image.webp", io.BytesIO(b"image data")
+        )
+        self.assert_revalidates(f"/gridfs/{file_id}")
+
+    def test_index_etag_changes_after_edit(self):
+        """Test that editing a post changes the index ETag"""
+        etag = self.assert_revalidates("/")
+        author = self.login("alice", blog.app.test_client())
+        response = author.post(
+            f"/edit-post/{self.post_id}",
+            data={
+                "title": "Edited Post",
+                "subtitle": "Edited subtitle",
+                "img_url": "https://example.com/image.png",
+                "body": "Edited body",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+
+        response = self.client.get("/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertIn("Edited Post", response.get_data(as_text=True))
+
+
+class TestCacheInvalidation(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_user("alice", is_admin=True)
+        self.add_user("bobby")
+        self.commented_id = self.add_post("Commented Post", "alice")
+        self.other_id = self.add_post("Other Post", "alice")
+        self.db.blog_comments.insert_one(
+            {
+                "text": "bob says hi",
+                "comment_author": "bobby",
+                "parent_post": blog.get_id_for_query(self.commented_id),
+            }
+        )
+
+    def cached(self, name):
+        """Arguments of the cached entries for function `name`"""
+        return {key[1] for key in blog.cache_storage if key[0] == name}
+
+    def test_user_toggle_drops_only_affected_entries(self):
+        """Test that disabling a user keeps unrelated posts cached"""
+        for url in (
+            "/",
+            f"/post/{self.commented_id}",
+            f"/post/{self.other_id}",
+        ):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        admin = self.login("alice", blog.app.test_client())
+        bobby = self.db.users.find_one({"name": "bobby"})
+        response = admin.post(f"/admin/toggle_user_status/{bobby['_id']}")
+        self.assertEqual(response.status_code, 302)
+
+        self.assertFalse(self.cached("get_all_posts"))
+        self.assertEqual(
+            self.cached("get_post_with_comments"), {(self.other_id,)}
+        )
+        html = self.client.get(f"/post/{self.commented_id}").get_data(
+            as_text=True
+        )
+        self.assertNotIn("bob says hi", html)
+
+    def test_edit_drops_only_pages_listing_post(self):
+        """Test that editing a post keeps other list pages cached"""
+        with mock.patch.object(blog, "POSTS_PER_PAGE", 1):
+            # Newest first: the other post is on page 1, the edited on page 2
+            for page in (1, 2):
+                response = self.client.get(f"/?page={page}")
+                self.assertEqual(response.status_code, 200)
+
+            author = self.login("alice", blog.app.test_client())
+            response = author.post(
+                f"/edit-post/{self.commented_id}",
+                data={
+                    "title": "Edited Post",
+                    "subtitle": "Edited subtitle",
+                    "img_url": "https://example.com/image.png",
+                    "body": "Edited body",
+                },
+            )
+            self.assertEqual(response.status_code, 302)
+
+            self.assertEqual(self.cached("get_all_posts"), {(1,)})
+            html = self.client.get("/?page=2").get_data(as_text=True)
+            self.assertIn("Edited Post", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
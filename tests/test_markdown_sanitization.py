@@ -0,0 +1,59 @@
+from app import markdown_to_html
+import os
+import sys
+import unittest
+
+# Add the project directory to the Python path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+
+class TestMarkdownSanitization(unittest.TestCase):
+
+    def test_basic_markdown(self):
+        """Test that markdown is rendered to HTML"""
+        html = markdown_to_html("# Title\n\nSome **bold** text")
+        self.assertIn("<h1>Title</h1>", html)
+        self.assertIn("<strong>bold</strong>", html)
+
+    def test_script_removed(self):
+        """Test that script tags are stripped"""
+        html = markdown_to_html("hello <script>alert('xss')</script>")
+        self.assertNotIn("<script", html)
+        self.assertNotIn("alert", html)
+
+    def test_event_handlers_removed(self):
+        """Test that event handler attributes are stripped"""
+        html = markdown_to_html(
+            '<img src="http://example.com/a.png" onerror="x">'
+        )
+        self.assertIn('src="http://example.com/a.png"', html)
+        self.assertNotIn("onerror", html)
+
+    def test_javascript_urls_removed(self):
+        """Test that javascript: links lose their href"""
+        html = markdown_to_html("[click](javascript:alert(1))")
+        self.assertNotIn("javascript:", html)
+
+    def test_css_properties_filtered(self):
+        """Test that only allowed CSS properties survive"""
+        html = markdown_to_html(
+            '<img src="http://example.com/a.png" style="width: 10px; position: fixed">'
+        )
+        self.assertIn("width", html)
+        self.assertNotIn("position", html)
+
+    def test_empty_input(self):
+        """Test that empty, missing or blank text renders as an empty string"""
+        self.assertEqual(markdown_to_html(""), "")
+        self.assertEqual(markdown_to_html(None), "")
+        self.assertEqual(markdown_to_html("  \n\t"), "")
+
+    def test_code_highlighting_classes_kept(self):
+        """Test that codehilite classes are preserved"""
+        html = markdown_to_html("```python\nprint(1)\n```")
+        self.assertIn('class="highlight"', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+from app_test_case import AppTestCase
+from unittest import mock
+import app as blog
+import unittest
+
+
+class TestPagination(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(blog, "POSTS_PER_PAGE", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.add_user("alice")
+        for title in ("First Post", "Second Post", "Third Post"):
+            self.add_post(title, "alice")
+
+    def test_newest_posts_first(self):
+        """Test that page 1 shows the newest posts"""
+        html = self.client.get("/").get_data(as_text=True)
+        self.assertIn("Third Post", html)
+        self.assertIn("Second Post", html)
+        self.assertNotIn("First Post", html)
+        self.assertLess(html.index("Third Post"), html.index("Second Post"))
+
+    def test_last_page(self):
+        """Test that the oldest post is on the last page"""
+        response = self.client.get("/?page=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("First Post", response.get_data(as_text=True))
+
+    def test_page_out_of_range(self):
+        """Test that pages past the last post are not found or cached"""
+        for page in ("3", "99999999999999999999"):
+            response = self.client.get(f"/?page={page}")
+            self.assertEqual(response.status_code, 404)
+        self.assertFalse(
+            [key for key in blog.cache_storage if key[0] == "get_all_posts"]
+        )
+
+    def test_disabled_authors_posts_not_counted(self):
+        """Test that hidden posts don't add pages"""
+        self.add_user("bobby", is_active=False)
+        for number in range(6):
+            self.add_post(f"Hidden Post {number}", "bobby")
+        self.assertEqual(self.client.get("/?page=2").status_code, 200)
+        for page in (3, 4, 5):
+            response = self.client.get(f"/?page={page}")
+            self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            {key[1] for key in blog.cache_storage if key[0] == "get_all_posts"},
+            {(2,)},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
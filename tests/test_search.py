@@ -0,0 +1,40 @@
+from app_test_case import AppTestCase
+import unittest
+
+
+class TestSearch(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_user("alice")
+        self.add_post("Dogs NOT Cats", "alice")
+        self.add_post("Python Tips", "alice")
+
+    def search(self, query):
+        response = self.client.post("/search", data={"query": query})
+        self.assertEqual(response.status_code, 200)
+        return response.get_data(as_text=True)
+
+    def test_search_ignores_case(self):
+        """Test that upper-case queries match lowercased index text"""
+        html = self.search("PYTHON")
+        self.assertIn("Python Tips", html)
+        self.assertNotIn("Dogs NOT Cats", html)
+
+    def test_operators_are_words(self):
+        """Test that upper-case AND/OR/NOT are searched as plain words"""
+        self.assertIn("Dogs NOT Cats", self.search("Dogs NOT Cats"))
+        self.assertNotIn("Python Tips", self.search("Python OR Dogs"))
+
+    def test_empty_search_redirects_to_index(self):
+        """Test that searching for nothing shows the paged index instead"""
+        for response in (
+            self.client.get("/search"),
+            self.client.post("/search", data={"query": ""}),
+        ):
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response.headers["Location"], "/")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+from app import WorkerBytecodeCache
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add the project directory to the Python path
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_dir)
+
+
+class TestTemplateCache(unittest.TestCase):
+
+    def render(self, cache):
+        env = Environment(
+            loader=DictLoader({"page.html": "Hello {{ name }}"}),
+            bytecode_cache=cache,
+        )
+        return env.get_template("page.html").render(name="world")
+
+    def test_cache_created_on_first_use(self):
+        """Test that the cache directory is only chosen when first used"""
+        cache = WorkerBytecodeCache()
+        self.assertIsNone(cache.cache)
+        self.assertEqual(self.render(cache), "Hello world")
+        self.assertIsInstance(cache.cache, FileSystemBytecodeCache)
+        self.assertFalse(cache.disabled)
+
+    def test_write_error_disables_cache(self):
+        """Test that a cache that can't be written is turned off"""
+        tmp_dir = tempfile.mkdtemp()
+        shutil.rmtree(tmp_dir)
+        cache = WorkerBytecodeCache()
+        cache.cache = FileSystemBytecodeCache(tmp_dir)
+        self.assertEqual(self.render(cache), "Hello world")
+        self.assertTrue(cache.disabled)
+        self.assertEqual(self.render(cache), "Hello world")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+from app_test_case import AppTestCase
+from PIL import Image
+from unittest import mock
+import app as blog
+import io
+import neosqlite
+import unittest
+
+
+class TestUploads(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_user("alice")
+        self.login("alice")
+
+    def image_file(self, size, mode="RGB", image_format="PNG"):
+        buffer = io.BytesIO()
+        Image.new(mode, size).save(buffer, image_format)
+        buffer.seek(0)
+        return buffer
+
+    def stored_image(self):
+        """Open the only stored upload with Pillow"""
+        gfs = neosqlite.gridfs.GridFSBucket(self.db.db)
+        (stored,) = list(gfs.find({}))
+        data = gfs.open_download_stream(stored._id).read()
+        return Image.open(io.BytesIO(data))
+
+    def test_upload_converts_to_webp(self):
+        """Test that uploads are stored as WebP"""
+        response = self.client.post(
+            "/upload",
+            data={"file": (self.image_file((50, 40), "RGBA"), "image.png")},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("/gridfs/", response.get_json()["data"]["filePath"])
+        image = self.stored_image()
+        self.assertEqual(image.format, "WEBP")
+        self.assertEqual(image.size, (50, 40))
+
+    def test_upload_downscaled(self):
+        """Test that images larger than max_image_dimension are downscaled"""
+        with mock.patch.object(blog, "MAX_IMAGE_DIMENSION", 64):
+            response = self.client.post(
+                "/upload",
+                data={"file": (self.image_file((200, 100)), "image.png")},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_image().size, (64, 32))
+
+    def test_upload_over_pixel_limit(self):
+        """Test that images over the pixel limit are rejected"""
+        with mock.patch.object(blog, "MAX_IMAGE_PIXELS", 1000):
+            response = self.client.post(
+                "/upload",
+                data={"file": (self.image_file((40, 40)), "image.png")},
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("not a valid image", response.get_json()["error"])
+
+    def test_upload_invalid_image(self):
+        """Test that files that don't decode as images are rejected"""
+        response = self.client.post(
+            "/upload",
+            data={"file": (io.BytesIO(b"not an image"), "image.png")},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("not a valid image", response.get_json()["error"])
+
+    def test_upload_image_page_invalid_image(self):
+        """Test that the upload page flashes an error for invalid images"""
+        response = self.client.post(
+            "/upload-image",
+            data={"file": (io.BytesIO(b"not an image"), "image.jpg")},
+        )
+        self.assertEqual(response.status_code, 302)
+        with self.client.session_transaction() as session:
+            messages = [message for _, message in session["_flashes"]]
+        self.assertIn("not a valid image", messages[0])
+        self.assertFalse(
+            list(neosqlite.gridfs.GridFSBucket(self.db.db).find({}))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()